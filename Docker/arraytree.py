@@ -0,0 +1,264 @@
+"""Array-backed Trees
+
+Flat, preorder array representation of a rooted tree, used where
+dendropy's node objects are too slow (e.g. sampling millions of
+triples against the SC3 tree).
+"""
+
+import re
+
+import numpy as np
+
+# Characters that force a Newick label to be quoted, as in dendropy.
+_NEWICK_SPECIAL = re.compile(r"""[()[\]{},;:'"\0\t\n]""")
+
+
+def _newick_label(label):
+    """Escape a label for Newick the way dendropy writes it.
+
+    Spaces in plain labels are written as '_'. Labels containing
+    underscores or Newick metacharacters (including tabs) are
+    single-quoted, with quotes doubled.
+    """
+    if "_" not in label and not _NEWICK_SPECIAL.search(label):
+        return label.replace(" ", "_")
+    return "'" + label.replace("'", "''") + "'"
+
+
+def _sparse_table(values):
+    """Build a sparse table for range-argmin queries over `values`.
+
+    Row k holds, for every start i, the index of the smallest value in
+    values[i:i + 2**k]. Entries past the end of a row are never read.
+    Rows are flattened into one array, returned with a floor(log2)
+    lookup for range widths so that queries need no float math.
+    """
+    n = len(values)
+    table = np.zeros((max(1, n.bit_length()), n), dtype=np.int64)
+    table[0] = np.arange(n)
+    for k in range(1, len(table)):
+        half = 1 << (k - 1)
+        width = n - (1 << k) + 1
+        left = table[k - 1, :width]
+        right = table[k - 1, half:half + width]
+        table[k, :width] = np.where(values[left] <= values[right],
+                                    left, right)
+    widths = np.arange(1, n + 1)
+    log2 = np.zeros(n + 1, dtype=np.int64)
+    log2[1:] = np.floor(np.log2(widths))
+    return table.ravel(), log2
+
+
+def _range_argmin(table, values, start, stop):
+    """Index of the smallest value in values[start:stop + 1], vectorized."""
+    flat, log2 = table
+    n = len(values)
+    k = log2[stop - start + 1]
+    left = flat[k * n + start]
+    right = flat[k * n + stop - (1 << k) + 1]
+    return np.where(values[left] <= values[right], left, right)
+
+
+class ArrayTree:
+    """Rooted tree stored as flat arrays, with nodes in preorder.
+
+    Node 0 is the root, and the subtree of node v occupies the slice
+    [v, v + size[v]).
+
+    Attributes:
+        parent: parent of each node (-1 for the root)
+        depth: number of edges between each node and the root
+        size: number of nodes in each subtree
+        labels: taxon label of each leaf, node label (or None) of each
+                internal node
+        edge_length: length of the edge above each node (nan if unset)
+        leaves: node indices of the leaves, in preorder
+    """
+
+    def __init__(self, parent, depth, size, labels, edge_length):
+        self.parent = np.asarray(parent, dtype=np.int64)
+        self.depth = np.asarray(depth, dtype=np.int64)
+        self.size = np.asarray(size, dtype=np.int64)
+        self.labels = np.asarray(labels, dtype=object)
+        self.edge_length = np.asarray(edge_length, dtype=float)
+        self.leaves = np.flatnonzero(self.size == 1)
+        self._end = np.arange(len(self.parent)) + self.size
+
+        # Built on first use, so that restrictions stay cheap.
+        self._leaf_index = None
+        self._depth_table = None
+        self._root_distance = None
+
+    @classmethod
+    def from_dendropy(cls, tree):
+        """Convert a dendropy tree into an ArrayTree."""
+        index = {}
+        parent = []
+        depth = []
+        labels = []
+        edge_length = []
+        for node in tree.preorder_node_iter():
+            index[node] = len(parent)
+            if node.parent_node is None:
+                parent.append(-1)
+                depth.append(0)
+            else:
+                parent.append(index[node.parent_node])
+                depth.append(depth[parent[-1]] + 1)
+            labels.append(node.taxon.label if node.taxon is not None
+                          else node.label)
+            edge_length.append(node.edge.length
+                               if node.edge.length is not None else np.nan)
+
+        size = [1] * len(parent)
+        for node in range(len(parent) - 1, 0, -1):
+            size[parent[node]] += size[node]
+        return cls(parent, depth, size, labels, edge_length)
+
+    @property
+    def leaf_labels(self):
+        """Set of taxon labels on the leaves."""
+        return set(self.labels[self.leaves])
+
+    def leaf_positions(self, labels):
+        """Positions in `leaves` of the leaves with the given taxon labels."""
+        if self._leaf_index is None:
+            self._leaf_index = {label: position for position, label
+                                in enumerate(self.labels[self.leaves])}
+        return np.array([self._leaf_index[label] for label in labels],
+                        dtype=np.int64)
+
+    def leaf_nodes(self, labels):
+        """Node indices of the leaves with the given taxon labels."""
+        return self.leaves[self.leaf_positions(labels)]
+
+    def leaf_counts(self, mask):
+        """Number of masked nodes within each subtree.
+
+        Args:
+            mask: boolean array over all nodes
+
+        Returns:
+            int array with the count for every node
+        """
+        cumulative = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+        return cumulative[self._end] - cumulative[:-1]
+
+    def subtree_min(self, values):
+        """Smallest of `values` (one per node) within each subtree."""
+        values = np.asarray(values)
+        smallest = _range_argmin(_sparse_table(values), values,
+                                 np.arange(len(self.parent)), self._end - 1)
+        return values[smallest]
+
+    def restrict(self, mask):
+        """Induced subtree on a subset of the leaves.
+
+        Internal nodes left with a single child are contracted, summing
+        edge lengths along the contracted path. Runs in O(n) numpy
+        operations with no per-node Python work, once this tree's LCA
+        lookup table has been built (O(n log n), on first use).
+
+        Args:
+            mask: boolean array over `leaves`, True for leaves to keep
+
+        Returns:
+            ArrayTree restricted to the masked leaves
+        """
+        n = len(self.parent)
+        keep = np.zeros(n, dtype=bool)
+        keep[self.leaves[np.asarray(mask, dtype=bool)]] = True
+        if not keep.any():
+            raise ValueError("Restriction must keep at least one leaf")
+
+        # Keep internal nodes where two or more kept leaves branch apart.
+        counts = self.leaf_counts(keep)
+        branches = np.bincount(self.parent[1:][counts[1:] > 0], minlength=n)
+        keep |= branches >= 2
+        nodes = np.flatnonzero(keep)
+        kept_before = np.concatenate(([0], np.cumsum(keep)))
+        size = kept_before[self._end[nodes]] - kept_before[nodes]
+
+        # Kept nodes are closed under LCA, so each one's parent is its LCA
+        # with the kept node before it in preorder.
+        parent = np.full(len(nodes), -1)
+        parent[1:] = kept_before[self.lca(nodes[:-1], nodes[1:])]
+
+        # New depth is the number of kept strict ancestors.
+        ancestors = np.cumsum(
+            np.bincount(nodes + 1, minlength=n + 1) -
+            np.bincount(self._end[nodes], minlength=n + 1))
+        depth = ancestors[nodes]
+
+        # Sum edge lengths along contracted paths, via root distances.
+        if self._root_distance is None:
+            lengths = np.nan_to_num(self.edge_length)
+            self._root_distance = np.cumsum(
+                np.append(lengths, 0) -
+                np.bincount(self._end, weights=lengths, minlength=n + 1))
+        edge_length = self.edge_length[nodes]
+        edge_length[0] = np.nan
+        contracted = np.flatnonzero(
+            nodes[parent[1:]] != self.parent[nodes[1:]]) + 1
+        edge_length[contracted] += (
+            self._root_distance[self.parent[nodes[contracted]]] -
+            self._root_distance[nodes[parent[contracted]]])
+
+        return ArrayTree(parent, depth, size, self.labels[nodes],
+                         edge_length)
+
+    def restrict_to_labels(self, labels):
+        """Induced subtree on the leaves with the given taxon labels.
+
+        Looks up each label in a dict, so for many restrictions over the
+        same labels build the mask once (see `leaf_positions`) and call
+        `restrict` instead.
+        """
+        mask = np.zeros(len(self.leaves), dtype=bool)
+        mask[self.leaf_positions(labels)] = True
+        return self.restrict(mask)
+
+    def as_newick(self):
+        """Newick string of the tree, with labels escaped as in dendropy."""
+        def annotate(node):
+            label = self.labels[node]
+            text = _newick_label(label) if label is not None else ''
+            if not np.isnan(self.edge_length[node]):
+                text += f":{self.edge_length[node]}"
+            return text
+
+        parts = []
+        open_nodes = []
+        for node in range(len(self.parent)):
+            if self.size[node] > 1:
+                parts.append('(')
+                open_nodes.append(node)
+                continue
+            parts.append(annotate(node))
+            while open_nodes and (open_nodes[-1] + self.size[open_nodes[-1]]
+                                  == node + 1):
+                parts.append(')' + annotate(open_nodes.pop()))
+            if node + 1 < len(self.parent):
+                parts.append(',')
+        return ''.join(parts) + ';\n'
+
+    def lca(self, first, second):
+        """Lowest common ancestors of two arrays of nodes.
+
+        Uses the preorder RMQ identity: for u preceding v, the LCA is the
+        parent of the shallowest node in preorder positions (u, v].
+        """
+        first = np.asarray(first, dtype=np.int64)
+        second = np.asarray(second, dtype=np.int64)
+        low = np.minimum(first, second)
+        high = np.maximum(first, second)
+        distinct = low != high
+        if self._depth_table is None:
+            self._depth_table = _sparse_table(self.depth)
+        shallowest = _range_argmin(self._depth_table, self.depth,
+                                   np.where(distinct, low + 1, low), high)
+        return np.where(distinct, self.parent[shallowest], low)
+
+    def lca_depth(self, first, second):
+        """Depth of the lowest common ancestors of two arrays of nodes."""
+        return self.depth[self.lca(first, second)]
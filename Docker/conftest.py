@@ -0,0 +1,30 @@
+"""Shared fixtures for the scoring tests"""
+import pytest
+
+
+def _random_newick(labels, rng, polytomies=False, lengths=False):
+    """Random rooted Newick tree over `labels`, named 'root'.
+
+    Args:
+        labels: leaf labels
+        rng: random.Random instance
+        polytomies: also merge three subtrees at a time
+        lengths: give every non-root edge a random length
+    """
+    def length():
+        return f":{rng.random():.3f}" if lengths else ""
+
+    nodes = [label + length() for label in labels]
+    while len(nodes) > 1:
+        size = rng.choice([2, 3]) if polytomies and len(nodes) > 2 else 2
+        rng.shuffle(nodes)
+        subtree = "(" + ",".join(nodes[:size]) + ")"
+        nodes = nodes[size:]
+        nodes.append(subtree + length() if nodes else subtree)
+    return nodes[0] + "root;"
+
+
+@pytest.fixture
+def random_newick():
+    """Factory for random rooted Newick trees."""
+    return _random_newick
@@ -0,0 +1,166 @@
+"""Preview Scoring
+
+Estimate the normalized RF and triplet scores of an SC3 submission
+without running TreeCmp, so that validation can report a score right
+away. SC2 is scored against Yule averages instead, which this does not
+reproduce.
+"""
+
+import time
+
+import numpy as np
+import scipy.stats
+
+from arraytree import ArrayTree
+import score
+
+# Number of triples scored per vectorized batch; the time budget is
+# checked between batches.
+BATCH_SIZE = 10000
+
+
+def _clusters(tree, mask):
+    """Nodes spanning each distinct cluster of the masked leaves.
+
+    Returns:
+        cluster nodes, and the masked leaf count of every node
+    """
+    counts = tree.leaf_counts(mask)
+    children = np.arange(1, len(tree.parent))
+    parents = tree.parent[children]
+
+    # A node with a child covering the same leaves repeats that cluster.
+    repeated = np.zeros(len(counts), dtype=bool)
+    repeated[parents[counts[children] == counts[parents]]] = True
+    return np.flatnonzero((counts >= 2) & ~repeated), counts
+
+
+def cluster_distance(gs_index, pred_index, gs_leaves, pred_leaves):
+    """Exact RF cluster distance, restricted to the given common leaves.
+
+    As in TreeCmp, this is half the number of clusters found in only one
+    of the trees. A goldstandard cluster is also in the prediction tree
+    iff the LCA of its leftmost and rightmost leaves (in prediction
+    preorder) spans exactly as many common leaves.
+
+    Args:
+        gs_index: Goldstandard ArrayTree
+        pred_index: Prediction ArrayTree
+        gs_leaves: Goldstandard nodes of the common leaves
+        pred_leaves: Prediction nodes of the same leaves, in the same order
+    """
+    gs_mask = np.zeros(len(gs_index.parent), dtype=bool)
+    gs_mask[gs_leaves] = True
+    pred_mask = np.zeros(len(pred_index.parent), dtype=bool)
+    pred_mask[pred_leaves] = True
+    gs_clusters, gs_counts = _clusters(gs_index, gs_mask)
+    pred_clusters, pred_counts = _clusters(pred_index, pred_mask)
+
+    leftmost = np.full(len(gs_index.parent), len(pred_index.parent))
+    leftmost[gs_leaves] = pred_leaves
+    rightmost = np.full(len(gs_index.parent), -1)
+    rightmost[gs_leaves] = pred_leaves
+    span = pred_index.lca(gs_index.subtree_min(leftmost)[gs_clusters],
+                          -gs_index.subtree_min(-rightmost)[gs_clusters])
+    shared = np.count_nonzero(pred_counts[span] == gs_counts[gs_clusters])
+    return (len(gs_clusters) + len(pred_clusters)) / 2 - shared
+
+
+def _triple_topology(tree, first, second, third):
+    """Resolved cherry of each triple (0: second/third, 1: first/third,
+    2: first/second), or 3 if the triple is unresolved."""
+    depths = np.stack([tree.lca_depth(second, third),
+                       tree.lca_depth(first, third),
+                       tree.lca_depth(first, second)])
+    resolved = (depths == depths.max(axis=0)).sum(axis=0) == 1
+    return np.where(resolved, depths.argmax(axis=0), 3)
+
+
+def _sample_triples(rng, n, size):
+    """Sample `size` triples of distinct indices below n."""
+    first = rng.integers(0, n, size)
+    second = rng.integers(0, n - 1, size)
+    second += second >= first
+    low = np.minimum(first, second)
+    high = np.maximum(first, second)
+    third = rng.integers(0, n - 2, size)
+    third += third >= low
+    third += third >= high
+    return np.stack([first, second, third], axis=1)
+
+
+def _wilson_interval(successes, trials, confidence):
+    """Wilson score interval for a binomial proportion."""
+    z = scipy.stats.norm.ppf(0.5 + confidence / 2)
+    proportion = successes / trials
+    denominator = 1 + z**2 / trials
+    centre = (proportion + z**2 / (2 * trials)) / denominator
+    half_width = z * np.sqrt(proportion * (1 - proportion) / trials +
+                             z**2 / (4 * trials**2)) / denominator
+    return max(0, centre - half_width), min(1, centre + half_width)
+
+
+def preview_scores(pred_tree, gs_index, sample_size=100000, time_budget=2.0,
+                   confidence=0.95, seed=None):
+    """Estimate normalized RF and triplet scores of a submission.
+
+    Scores are normalized as in score_sc3. The RF score is exact; the
+    triplet score is estimated from up to `sample_size` random triples of
+    common leaves, stopping early once `time_budget` seconds have passed,
+    and comes with a confidence interval.
+
+    Args:
+        pred_tree: Submission tree (dendropy), rerooted in place
+        gs_index: Goldstandard ArrayTree
+        sample_size: Maximum number of triples to sample
+        time_budget: Seconds after which sampling stops
+        confidence: Confidence level of the triplet score interval
+        seed: Seed for sampling triples
+
+    Returns:
+        dict of the estimated scores
+
+    Raises:
+        ValueError: if sample_size is not positive
+    """
+    if sample_size < 1:
+        raise ValueError("sample_size must be positive")
+    start = time.monotonic()
+    pred_index = ArrayTree.from_dendropy(score.reroot_submission(pred_tree))
+
+    # As in TreeCmp, score both trees restricted to their common taxa.
+    gs_labels = gs_index.leaf_labels
+    pred_labels = pred_index.leaf_labels
+    common = gs_labels & pred_labels
+    if common != gs_labels:
+        gs_index = gs_index.restrict_to_labels(common)
+    if common != pred_labels:
+        pred_index = pred_index.restrict_to_labels(common)
+
+    common = sorted(common)
+    n = len(common)
+    gs_leaves = gs_index.leaf_nodes(common)
+    pred_leaves = pred_index.leaf_nodes(common)
+
+    rf = cluster_distance(gs_index, pred_index, gs_leaves, pred_leaves)
+
+    rng = np.random.default_rng(seed)
+    sampled = 0
+    different = 0
+    while sampled < sample_size and (
+            not sampled or time.monotonic() - start < time_budget):
+        size = min(BATCH_SIZE, sample_size - sampled)
+        triples = _sample_triples(rng, n, size)
+        gs_topology = _triple_topology(gs_index, *gs_leaves[triples].T)
+        pred_topology = _triple_topology(pred_index, *pred_leaves[triples].T)
+        different += np.count_nonzero(gs_topology != pred_topology)
+        sampled += size
+    lower, upper = _wilson_interval(different, sampled, confidence)
+
+    # Normalized triplet score is 3 * triples / (2 * C(n, 3)), i.e. 3/2 of
+    # the fraction of differing triples.
+    return {'RF': min(1, rf / (n - 3)),
+            'Triples': min(1, 1.5 * different / sampled),
+            'Triples_lower': min(1, 1.5 * lower),
+            'Triples_upper': min(1, 1.5 * upper),
+            'Triples_sampled': sampled}
@@ -57,17 +57,23 @@ def get_scores(path_truth_newick, path_submission_newick, path_score_output,
     return df_metrics
 
 
-def reroot_and_remap_submission(submissionfile):
-    """Reroot tree if applicable, and remap nodes if non-binary tree."""
-    pred_tree = dendropy.Tree.get(file=open(submissionfile, 'r'),
-                                  schema="newick",
-                                  tree_offset=0)
+def reroot_submission(pred_tree):
+    """Reroot tree in place if applicable, and remove unifurcations."""
     pred_tree.suppress_unifurcations()
     root_taxon = pred_tree.find_node_with_taxon_label('root')
 
     # If 'root' node is in the middle, must reroot the tree.
     if root_taxon:
         pred_tree.reroot_at_node(root_taxon, update_bipartitions=False)
+    return pred_tree
+
+
+def reroot_and_remap_submission(submissionfile):
+    """Reroot tree if applicable, and remap nodes if non-binary tree."""
+    pred_tree = dendropy.Tree.get(file=open(submissionfile, 'r'),
+                                  schema="newick",
+                                  tree_offset=0)
+    reroot_submission(pred_tree)
     output = "rerooted.new"
     with open(output, "w") as rerooted_tree:
         pred_tree.write(file=rerooted_tree, schema="newick")
@@ -0,0 +1,101 @@
+"""Tests for array-backed trees"""
+import random
+
+import dendropy
+import numpy as np
+import pytest
+
+from arraytree import ArrayTree
+
+
+def tree_signature(tree):
+    """Clusters and rounded patristic distances between leaves."""
+    taxa = sorted((leaf.taxon for leaf in tree.leaf_node_iter()),
+                  key=lambda taxon: taxon.label)
+    clusters = {frozenset(leaf.taxon.label for leaf in node.leaf_iter())
+                for node in tree.postorder_node_iter()}
+    if len(taxa) < 2:
+        return clusters, {}
+    distances = tree.phylogenetic_distance_matrix()
+    return clusters, {(first.label, second.label):
+                      round(distances(first, second), 6)
+                      for first in taxa for second in taxa
+                      if first.label < second.label}
+
+
+def dendropy_restrict(newick, keep):
+    """Reference restriction with dendropy prune and suppress."""
+    tree = dendropy.Tree.get(data=newick, schema="newick")
+    tree.prune_taxa([taxon for taxon in tree.taxon_namespace
+                     if taxon.label not in keep])
+    tree.suppress_unifurcations()
+    return tree
+
+
+def test_restrict_matches_dendropy(random_newick):
+    """Random restrictions agree with dendropy prune+suppress."""
+    rng = random.Random(0)
+    for _ in range(200):
+        labels = [f"x_{i}" for i in range(rng.randint(2, 30))]
+        newick = random_newick(labels, rng, polytomies=True, lengths=True)
+        tree = ArrayTree.from_dendropy(
+            dendropy.Tree.get(data=newick, schema="newick"))
+        mask = np.array([rng.random() < 0.6 for _ in tree.leaves])
+        mask[rng.randrange(len(mask))] = True
+        keep = set(tree.labels[tree.leaves[mask]])
+
+        restricted = tree.restrict(mask)
+        result = dendropy.Tree.get(data=restricted.as_newick(),
+                                   schema="newick")
+        assert all(len(node.child_nodes()) != 1
+                   for node in result.postorder_node_iter())
+        assert (tree_signature(result) ==
+                tree_signature(dendropy_restrict(newick, keep)))
+
+        # Arrays match a fresh conversion of the written tree.
+        converted = ArrayTree.from_dendropy(result)
+        assert (converted.parent == restricted.parent).all()
+        assert (converted.depth == restricted.depth).all()
+        assert (converted.size == restricted.size).all()
+
+
+def test_restrict_single_leaf():
+    tree = ArrayTree.from_dendropy(dendropy.Tree.get(
+        data="((a:1,b:2):3,(c:4,(d:5,e:6):7):8)r;", schema="newick"))
+    restricted = tree.restrict([False, False, True, False, False])
+    assert restricted.as_newick() == "c;\n"
+
+
+def test_restrict_without_root():
+    """The new root is the LCA of the kept leaves, not the old root."""
+    tree = ArrayTree.from_dendropy(dendropy.Tree.get(
+        data="((a:1,b:2):3,(c:4,(d:5,e:6):7):8)r;", schema="newick"))
+    assert (tree.restrict([False, False, True, False, True]).as_newick() ==
+            "(c:4.0,e:13.0);\n")
+    assert (tree.restrict([False, False, True, True, True]).as_newick() ==
+            "(c:4.0,(d:5.0,e:6.0):7.0);\n")
+
+
+def test_restrict_requires_a_leaf():
+    tree = ArrayTree.from_dendropy(dendropy.Tree.get(data="((a,b),c);",
+                                                     schema="newick"))
+    with pytest.raises(ValueError):
+        tree.restrict([False, False, False])
+
+
+def test_restrict_to_labels():
+    tree = ArrayTree.from_dendropy(dendropy.Tree.get(
+        data="((a,b),(c,(d,e)))r;", schema="newick"))
+    assert (tree.restrict_to_labels({"a", "d", "e"}).as_newick() ==
+            tree.restrict([True, False, False, True, True]).as_newick())
+
+
+def test_as_newick_quotes_labels_like_dendropy():
+    tree = dendropy.Tree.get(
+        data="(('a:x':1,'it''s':2):3,('c_d':4,('e f','g(h)'):7):8)r;",
+        schema="newick")
+    newick = ArrayTree.from_dendropy(tree).as_newick()
+    assert newick == tree.as_string("newick")
+    round_trip = dendropy.Tree.get(data=newick, schema="newick")
+    assert ({leaf.taxon.label for leaf in round_trip.leaf_node_iter()} ==
+            {leaf.taxon.label for leaf in tree.leaf_node_iter()})
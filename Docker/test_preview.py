@@ -0,0 +1,121 @@
+"""Tests for preview scoring"""
+import itertools
+import json
+import os
+import random
+
+import dendropy
+import pytest
+import scipy.special
+
+from arraytree import ArrayTree
+import preview
+import validate
+
+REPO = os.path.join(os.path.dirname(__file__), "..")
+SC3_GOLDSTANDARD = os.path.join(REPO, "groundtruth_files", "sc3.nw")
+SC3_PREDICTION = os.path.join(REPO, "sample_predictions", "sc3.nw")
+
+# TreeCmp scores of the SC3 sample prediction, as listed in the README.
+SC3_RF = 0.40584785795732203
+SC3_TRIPLES = 0.21377180208546165
+
+
+def exact_scores(gs_tree, pred_tree):
+    """Normalized RF and triplet scores by brute force over common taxa."""
+    gs_leaves = {leaf.taxon.label: leaf for leaf in gs_tree.leaf_node_iter()}
+    pred_leaves = {leaf.taxon.label: leaf
+                   for leaf in pred_tree.leaf_node_iter()}
+    common = sorted(set(gs_leaves) & set(pred_leaves))
+
+    def clusters(tree):
+        found = set()
+        for node in tree.postorder_node_iter():
+            cluster = frozenset(leaf.taxon.label for leaf in node.leaf_iter()
+                                if leaf.taxon.label in common)
+            if len(cluster) >= 2:
+                found.add(cluster)
+        return found
+
+    def topology(leaves, triple):
+        ancestors = [list(leaves[label].ancestor_iter(inclusive=True))
+                     for label in triple]
+        depths = []
+        for first, second in ((1, 2), (0, 2), (0, 1)):
+            shared = set(ancestors[first]) & set(ancestors[second])
+            depths.append(max(len(list(node.ancestor_iter()))
+                              for node in shared))
+        deepest = max(depths)
+        return depths.index(deepest) if depths.count(deepest) == 1 else 3
+
+    n = len(common)
+    rf = len(clusters(gs_tree) ^ clusters(pred_tree)) / 2
+    triples = sum(topology(gs_leaves, triple) != topology(pred_leaves, triple)
+                  for triple in itertools.combinations(common, 3))
+    return (min(1, rf / (n - 3)),
+            min(1, 3 * triples / (2 * scipy.special.comb(n, 3))))
+
+
+def small_trees(random_newick, polytomies):
+    """Pairs of small random trees, some with missing or extra leaves."""
+    rng = random.Random(polytomies)
+    for trial in range(20):
+        labels = [f"x{i}" for i in range(rng.randint(6, 14))]
+        pred_labels = labels[trial % 2:] + ["extra"] * (trial % 3 == 0)
+        yield (random_newick(labels, rng, polytomies=polytomies),
+               random_newick(pred_labels, rng, polytomies=polytomies))
+
+
+@pytest.mark.parametrize("polytomies", [False, True])
+def test_preview_matches_exact_scores(random_newick, polytomies):
+    """RF is exact, and the triplet interval covers the exact score."""
+    for seed, (gs_newick, pred_newick) in enumerate(
+            small_trees(random_newick, polytomies)):
+        gs_tree = dendropy.Tree.get(data=gs_newick, schema="newick")
+        pred_tree = dendropy.Tree.get(data=pred_newick, schema="newick")
+        rf, triples = exact_scores(gs_tree, pred_tree)
+
+        # A wide interval keeps the 40 coverage checks from failing by
+        # chance, as a few would at 95%.
+        scores = preview.preview_scores(pred_tree,
+                                        ArrayTree.from_dendropy(gs_tree),
+                                        sample_size=20000, confidence=0.999,
+                                        seed=seed)
+        assert scores['RF'] == pytest.approx(rf)
+        assert scores['Triples_lower'] <= triples <= scores['Triples_upper']
+
+
+def test_preview_covers_sc3_sample_score():
+    """Preview of the SC3 sample prediction agrees with TreeCmp."""
+    gs_tree = dendropy.Tree.get(path=SC3_GOLDSTANDARD, schema="newick")
+    pred_tree = dendropy.Tree.get(path=SC3_PREDICTION, schema="newick")
+    scores = preview.preview_scores(pred_tree,
+                                    ArrayTree.from_dendropy(gs_tree),
+                                    time_budget=60, seed=0)
+    assert scores['RF'] == pytest.approx(SC3_RF)
+    assert scores['Triples_lower'] <= SC3_TRIPLES <= scores['Triples_upper']
+    assert scores['Triples_sampled'] == 100000
+
+
+def test_preview_rejects_non_positive_sample_size():
+    gs_tree = dendropy.Tree.get(data="((a,b),(c,(d,e)))root;",
+                                schema="newick")
+    pred_tree = dendropy.Tree.get(data="((a,c),(b,(d,e)))root;",
+                                  schema="newick")
+    with pytest.raises(ValueError):
+        preview.preview_scores(pred_tree, ArrayTree.from_dendropy(gs_tree),
+                               sample_size=0)
+
+
+def test_validate_ignores_preview_failure(tmp_path, monkeypatch):
+    """A failing preview leaves a valid submission VALIDATED."""
+    def fail(*args, **kwargs):
+        raise RuntimeError("preview failed")
+
+    monkeypatch.setattr(preview, "preview_scores", fail)
+    results = tmp_path / "results.json"
+    validate.main(SC3_PREDICTION, "FileEntity", SC3_GOLDSTANDARD,
+                  str(results), preview_sample_size=1000)
+    result_dict = json.loads(results.read_text())
+    assert result_dict['prediction_file_status'] == "VALIDATED"
+    assert not any(key.startswith("preview_") for key in result_dict)
@@ -4,9 +4,13 @@
 
 import argparse
 import json
+import sys
 
 import dendropy
 
+from arraytree import ArrayTree
+import preview
+
 
 def valid_leaf_names(tree, gs_tree):
     """Check that prediction tree uses correct leaf labels."""
@@ -49,13 +53,25 @@ def validate_tree(pred_tree, gs_tree):
     return invalid_errors
 
 
-def main(submission, entity_type, goldstandard, results):
+def positive_int(value):
+    """Parse a positive integer command line argument."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")
+    return number
+
+
+def main(submission, entity_type, goldstandard, results,
+         preview_sample_size=None):
     """Validate submission and write results to JSON.
 
     Args:
         submission: input file
         entity: Synapse entity type
         results: output file
+        preview_sample_size: number of triples to sample for SC3 preview
+                             scores of a valid submission (default: no
+                             preview)
     """
 
     invalid_reasons = []
@@ -81,6 +97,17 @@ def main(submission, entity_type, goldstandard, results):
     result_dict = {'prediction_file_errors': "\n".join(invalid_reasons)[:500],
                    'prediction_file_status': prediction_file_status,
                    'round': 1}
+    if preview_sample_size and not invalid_reasons:
+        # The preview is best-effort and must never fail a valid entry.
+        try:
+            scores = preview.preview_scores(
+                pred_tree, ArrayTree.from_dendropy(gs_tree),
+                sample_size=preview_sample_size)
+        except Exception as err:
+            print(f"Preview scores not available: {err}", file=sys.stderr)
+        else:
+            result_dict.update({f'preview_{key}': value
+                                for key, value in scores.items()})
 
     with open(results, 'w') as out:
         out.write(json.dumps(result_dict))
@@ -96,6 +123,9 @@ if __name__ == "__main__":
                         required=True, help="Synapse entity type")
     parser.add_argument("-r", "--results",
                         required=True, help="Results file")
+    parser.add_argument("-p", "--preview_sample_size", type=positive_int,
+                        help="Number of triples to sample for SC3 preview "
+                             "scores")
 
     args = parser.parse_args()
     if not args.submission_file:
@@ -108,4 +138,5 @@ if __name__ == "__main__":
             ))
     else:
         main(args.submission_file, args.entity_type,
-             args.goldstandard, args.results)
+             args.goldstandard, args.results,
+             preview_sample_size=args.preview_sample_size)
@@ -5,27 +5,30 @@ later be used as the input file to TreeCmp.
 """
 
 import argparse
+import os
+import sys
 
 from random import shuffle
 import dendropy
+import numpy as np
 
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "Docker"))
+from arraytree import ArrayTree
 
-def augment_tree(tree_to_edit, percent):
+
+def augment_tree(tree, percent):
     """Prune leaf nodes from the given tree and return the new tree.
 
     Args:
-        tree_to_edit (str): filepath to tree
+        tree (ArrayTree): tree to prune, left unchanged
         percent (float): percentage of leaf nodes to prune off
     """
-    tree = dendropy.Tree.get(file=open(tree_to_edit, "r"),
-                             schema="newick",
-                             tree_offset=0)
-    leaf_nodes = tree.leaf_nodes()
+    leaf_nodes = list(range(len(tree.leaves)))
     shuffle(leaf_nodes)
     to_prune = leaf_nodes[:int(len(leaf_nodes)*percent)]
-    tree.prune_nodes(to_prune)
-    tree.suppress_unifurcations()
-    return tree.as_string("newick")
+    mask = np.ones(len(tree.leaves), dtype=bool)
+    mask[to_prune] = False
+    return tree.restrict(mask).as_newick()
 
 
 def main():
@@ -35,8 +38,8 @@ def main():
     parser.add_argument("-g", "--goldstandard", required=True)
     parser.add_argument("-sc", "--subchallenge", required=True,
                         choices=["sc2", "sc3", "sc3-final"])
-    parser.add_argument("-p", "--percent", default=0.3)
-    parser.add_argument('-n', "--number_trees", default=100)
+    parser.add_argument("-p", "--percent", type=float, default=0.3)
+    parser.add_argument('-n', "--number_trees", type=int, default=100)
 
     args = parser.parse_args()
     gs = args.goldstandard
@@ -46,8 +49,9 @@ def main():
                                     tree_offset=0)
         out.write(gs_tree.as_string("newick"))
 
+        gs_array_tree = ArrayTree.from_dendropy(gs_tree)
         for _ in range(args.number_trees):
-            augmented_tree = augment_tree(gs, args.percent)
+            augmented_tree = augment_tree(gs_array_tree, args.percent)
             out.write(augmented_tree)
 
 